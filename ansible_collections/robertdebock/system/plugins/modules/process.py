@@ -20,8 +20,18 @@ options:
   command:
     description:
       - The command to execute.
+      - Mutually exclusive with I(commands).
     type: str
-    required: true
+  commands:
+    description:
+      - A list of one-shot commands to run in parallel in a single module run.
+      - At most 32 commands run at the same time, the others start as running ones finish.
+      - I(timeout) applies to each command from the moment it starts.
+      - Use this instead of looping over I(command) to avoid starting the module once per command.
+      - Only used when state is present and background is false.
+      - Mutually exclusive with I(command) and I(pid_file).
+    type: list
+    elements: str
   state:
     description:
       - Whether the process should be running or stopped.
@@ -40,6 +50,13 @@ options:
       - Only used when background is false.
     type: int
     default: 300
+  capture_output:
+    description:
+      - Whether to capture stdout and stderr of one-shot processes.
+      - If false, the output is discarded and stdout and stderr are returned empty.
+      - Only used when background is false.
+    type: bool
+    default: true
   pid_file:
     description:
       - Path to store the PID for long-running processes.
@@ -55,7 +72,7 @@ options:
     type: dict
 requirements:
   - python >= 3.6
-  - psutil >= 5.0.0
+  - psutil >= 5.0.0 (only used as a fallback when /proc children lists or pidfds are unavailable)
 '''
 
 EXAMPLES = r'''
@@ -74,6 +91,14 @@ EXAMPLES = r'''
     state: present
     background: false
     timeout: 300
+
+# Run several one-shot commands in parallel
+- name: Run maintenance scripts
+  robertdebock.system.process:
+    commands:
+      - /usr/local/bin/cleanup.sh
+      - /usr/local/bin/rotate.sh
+    timeout: 300
 '''
 
 RETURN = r'''
@@ -83,10 +108,18 @@ pid:
   type: int
   sample: 1234
 rc:
-  description: Return code (for one-shot processes)
+  description: Return code (for one-shot processes), the first non-zero one when commands is used
   returned: when background is false
   type: int
   sample: 0
+results:
+  description:
+    - Return code, standard output and standard error per command.
+    - Commands that timed out or could not be started have failed and msg instead.
+  returned: when commands is used
+  type: list
+  elements: dict
+  sample: [{"command": "/usr/local/bin/cleanup.sh", "rc": 0, "stdout": "", "stderr": ""}]
 stdout:
   description: Standard output
   returned: always
@@ -109,69 +142,352 @@ status:
   sample: "running"
 '''
 
+import concurrent.futures
 import os
+import select
 import signal
 import subprocess
 import time
 import shlex
-import psutil
 from ansible.module_utils.basic import AnsibleModule
 
+# psutil is imported inside the functions that need it. Every task starts a
+# fresh interpreter, and one-shot commands never touch psutil, so they should
+# not pay for loading it.
+
+# Upper bound on one-shot commands running at the same time with commands
+_MAX_PARALLEL_COMMANDS = 32
+
+_MSG_ALREADY_RUNNING = "Process already running with PID {}"
+_MSG_STARTED = "Process started with PID {}"
+_MSG_TREE_STOPPED = "Process {} and its children stopped"
+_MSG_STOPPED = "Process {} stopped"
+_MSG_NOT_RUNNING = "Process not running"
+_MSG_NOT_FOUND = "Process not found"
+
 def read_pid_file(pid_file):
     """Read PID from file."""
-    if os.path.exists(pid_file):
-        with open(pid_file, 'r') as f:
-            try:
-                return int(f.read().strip())
-            except ValueError:
-                return None
-    return None
+    try:
+        with open(pid_file, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    try:
+        return int(data.strip())
+    except ValueError:
+        return None
 
 def write_pid_file(pid_file, pid):
     """Write PID to file."""
-    with open(pid_file, 'w') as f:
-        f.write(str(pid))
+    # Write to a private temporary file and rename it into place, so
+    # concurrent runs never see a partially written PID file
+    tmp_file = '%s.%d.tmp' % (pid_file, os.getpid())
+    fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        try:
+            os.write(fd, b'%d\n' % pid)
+        finally:
+            os.close(fd)
+        os.rename(tmp_file, pid_file)
+    except OSError:
+        remove_pid_file(tmp_file)
+        raise
 
-def is_process_running(pid):
-    """Check if process is running."""
+def remove_pid_file(pid_file):
+    """Remove PID file if it exists."""
     try:
-        os.kill(pid, 0)
-        return True
+        os.unlink(pid_file)
+    except FileNotFoundError:
+        pass
+
+def _read_proc_file(path):
+    """Read a /proc file using raw file descriptors."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        chunks = []
+        while True:
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                return b''.join(chunks)
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+
+def _read_cmdline(pid):
+    """Read the command line of a process from /proc."""
+    try:
+        data = _read_proc_file('/proc/%d/cmdline' % pid)
     except OSError:
-        return False
+        return None
+    return data.rstrip(b'\x00').replace(b'\x00', b' ').decode('utf-8', 'replace')
 
-def get_process_info(pid):
-    """Get process information using psutil."""
+def _pid_state(pid):
+    """Read the state letter of a process from /proc/<pid>/stat."""
     try:
-        process = psutil.Process(pid)
-        return {
-            'pid': process.pid,
-            'name': process.name(),
-            'cmdline': ' '.join(process.cmdline()),
-            'status': process.status(),
-            'create_time': process.create_time()
-        }
-    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        data = _read_proc_file('/proc/%d/stat' % pid)
+    except OSError:
         return None
+    # The command name may contain spaces and parentheses, the state follows the last ')'
+    return chr(data.rsplit(b') ', 1)[1][0])
+
+def _check_alive_and_mine(pid, command=None):
+    """Check if process is running and, when given, runs command."""
+    if command:
+        # Zombies have an empty command line, so they never match
+        cmdline = _read_cmdline(pid)
+        return cmdline is not None and command in cmdline
+    return _pid_state(pid) not in (None, 'Z', 'X')
+
+def _iter_cmdlines():
+    """Yield the PID and raw command line of every process in /proc."""
+    # The cost here is the open/read/close per PID. Batching those needs
+    # io_uring, which the standard library does not expose, so keep it simple.
+    with os.scandir('/proc') as entries:
+        for entry in entries:
+            if not entry.name.isdigit():
+                continue
+            try:
+                data = _read_proc_file('/proc/%s/cmdline' % entry.name)
+            except OSError:
+                continue
+            # Kernel threads and zombies have no command line
+            if data:
+                yield int(entry.name), data
 
 def find_process_by_command(command):
     """Find process by command pattern."""
+    # Only cmdline is needed, so read it straight from /proc instead of
+    # letting psutil build a Process object for every PID.
+    if not command:
+        return None
+    needle = command.encode('utf-8')
+    spans_args = b' ' in needle
     try:
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                if command in ' '.join(proc.info['cmdline']):
-                    return proc.info['pid']
-            except (psutil.NoSuchProcess, psutil.AccessDenied, TypeError):
+        for pid, data in _iter_cmdlines():
+            if needle in data:
+                return pid
+            # Only a command containing spaces can span several arguments
+            if spans_args and needle in data.rstrip(b'\x00').replace(b'\x00', b' '):
+                return pid
+    except OSError:
+        return _find_process_by_command_psutil(command)
+    return None
+
+def _find_process_by_command_psutil(command):
+    """Find process by command pattern using psutil."""
+    import psutil
+    try:
+        for proc in psutil.process_iter(attrs=['cmdline']):
+            cmdline = proc.info['cmdline']
+            if not cmdline:
                 continue
+            if any(command in arg for arg in cmdline):
+                return proc.pid
+            # Only a command containing spaces can span several arguments
+            if ' ' in command and command in ' '.join(cmdline):
+                return proc.pid
     except Exception:
         pass
     return None
 
+def _wait_pidfds(pids, timeout):
+    """Wait for processes to exit using pidfds, return the PIDs still alive."""
+    fds = {}
+    try:
+        for pid in pids:
+            try:
+                fds[os.pidfd_open(pid)] = pid
+            except ProcessLookupError:
+                continue
+
+        poller = select.poll()
+        for fd in fds:
+            poller.register(fd, select.POLLIN)
+
+        pending = dict(fds)
+        deadline = time.monotonic() + timeout
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for fd, event in poller.poll(remaining * 1000):
+                poller.unregister(fd)
+                pending.pop(fd, None)
+        return list(pending.values())
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+def _wait_process(process, timeout):
+    """Wait for a process without output pipes to exit."""
+    try:
+        if _wait_pidfds([process.pid], timeout):
+            raise subprocess.TimeoutExpired(process.args, timeout)
+    except (OSError, AttributeError):
+        return process.wait(timeout=timeout)
+    return process.wait()
+
+def _child_pids_fast(pid):
+    """List descendant PIDs using /proc/<pid>/task/<tid>/children."""
+    descendants = []
+    worklist = [pid]
+    while worklist:
+        parent = worklist.pop()
+        try:
+            children = []
+            for task in os.listdir('/proc/%d/task' % parent):
+                with open('/proc/%d/task/%s/children' % (parent, task)) as f:
+                    children.extend(int(child) for child in f.read().split())
+        except FileNotFoundError:
+            # Missing on kernels without CONFIG_PROC_CHILDREN
+            if parent == pid:
+                raise
+            continue
+        descendants.extend(children)
+        worklist.extend(children)
+    return descendants
+
+def _wait_procs(procs, timeout):
+    """Wait for processes to exit, return the ones still alive."""
+    # pidfds need Linux >= 5.3 and Python >= 3.9
+    try:
+        alive_pids = _wait_pidfds([proc.pid for proc in procs], timeout)
+        return [proc for proc in procs if proc.pid in alive_pids]
+    except (OSError, AttributeError):
+        import psutil
+        gone, still_alive = psutil.wait_procs(procs, timeout=timeout)
+        return still_alive
+
+def run_command(command, timeout, capture_output, working_dir=None, environment=None):
+    """Run a one-shot command and return its rc, stdout and stderr."""
+    # Use shlex to safely parse command
+    cmd_args = shlex.split(command)
+    process = subprocess.Popen(
+        cmd_args,
+        shell=False,  # Safer than shell=True
+        cwd=working_dir,
+        env=environment,
+        stdout=subprocess.PIPE if capture_output else subprocess.DEVNULL,
+        stderr=subprocess.PIPE if capture_output else subprocess.DEVNULL,
+    )
+    try:
+        if capture_output:
+            stdout, stderr = process.communicate(timeout=timeout)
+        else:
+            # No pipes to drain, so just wait for the process to exit
+            _wait_process(process, timeout)
+            stdout = stderr = b''
+    except subprocess.TimeoutExpired:
+        process.kill()
+        raise
+    return dict(
+        rc=process.returncode,
+        stdout=stdout.decode('utf-8', 'replace'),
+        stderr=stderr.decode('utf-8', 'replace'),
+    )
+
+def run_commands(commands, timeout, capture_output, working_dir=None, environment=None):
+    """Run one-shot commands in parallel, return futures in the given order."""
+    # Each worker runs one process, so the cap bounds the load on the host
+    workers = min(len(commands), _MAX_PARALLEL_COMMANDS)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        return [
+            executor.submit(run_command, command, timeout, capture_output, working_dir, environment)
+            for command in commands
+        ]
+
+def _wait_pids(pids, timeout):
+    """Wait for PIDs to exit, return the ones still alive."""
+    try:
+        return _wait_pidfds(pids, timeout)
+    except (OSError, AttributeError):
+        import psutil
+        procs = []
+        for pid in pids:
+            try:
+                procs.append(psutil.Process(pid))
+            except psutil.NoSuchProcess:
+                pass
+        gone, still_alive = psutil.wait_procs(procs, timeout=timeout)
+        return [proc.pid for proc in still_alive]
+
+def _process_group_pids(pgid):
+    """Split the leader and its descendants into group members and others."""
+    try:
+        descendants = _child_pids_fast(pgid)
+    except FileNotFoundError:
+        import psutil
+        try:
+            descendants = [child.pid for child in psutil.Process(pgid).children(recursive=True)]
+        except psutil.NoSuchProcess:
+            raise ProcessLookupError(pgid)
+
+    members = [pgid]
+    others = []
+    for pid in descendants:
+        try:
+            if os.getpgid(pid) == pgid:
+                members.append(pid)
+            else:
+                others.append(pid)
+        except ProcessLookupError:
+            continue
+    return members, others
+
+def kill_process_group(pgid, timeout=10):
+    """Kill all processes in a process group."""
+    # Collect the members before signalling, so the wait covers all of them
+    try:
+        members, others = _process_group_pids(pgid)
+        os.killpg(pgid, signal.SIGTERM)
+    except ProcessLookupError:
+        return False
+
+    # Descendants that moved to another process group are out of reach of
+    # killpg, so signal them one by one
+    for pid in others:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    # Force kill whatever outlives the timeout
+    still_alive = _wait_pids(members + others, timeout)
+    if any(pid in members for pid in still_alive):
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    for pid in still_alive:
+        if pid in others:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+    return True
+
 def kill_process_tree(pid, timeout=10):
     """Kill process and its children."""
+    # Background processes are started in their own session, so the whole
+    # tree can be signalled through the process group without walking /proc
+    try:
+        if os.getpgid(pid) == pid and pid != os.getpgrp():
+            return kill_process_group(pid, timeout)
+    except ProcessLookupError:
+        return False
+
+    import psutil
     try:
         process = psutil.Process(pid)
-        children = process.children(recursive=True)
+        try:
+            children = []
+            for child_pid in _child_pids_fast(pid):
+                try:
+                    children.append(psutil.Process(child_pid))
+                except psutil.NoSuchProcess:
+                    pass
+        except FileNotFoundError:
+            children = process.children(recursive=True)
         
         # First try graceful termination
         process.terminate()
@@ -182,7 +498,7 @@ def kill_process_tree(pid, timeout=10):
                 pass
         
         # Wait for processes to terminate
-        gone, still_alive = psutil.wait_procs(children + [process], timeout=timeout)
+        still_alive = _wait_procs(children + [process], timeout)
         
         # Force kill if still alive
         for proc in still_alive:
@@ -199,27 +515,37 @@ def main():
     module = AnsibleModule(
         argument_spec=dict(
             command=dict(type='str', required=False),
+            commands=dict(type='list', elements='str'),
             state=dict(type='str', choices=['present', 'absent'], default='present'),
             background=dict(type='bool', default=False),
             timeout=dict(type='int', default=300),
+            capture_output=dict(type='bool', default=True),
             pid_file=dict(type='str'),
             working_dir=dict(type='str'),
             environment=dict(type='dict'),
         ),
+        mutually_exclusive=[
+            ('command', 'commands'),
+            ('commands', 'pid_file'),
+        ],
         supports_check_mode=True,
     )
 
     command = module.params['command']
+    commands = module.params['commands']
     state = module.params['state']
     background = module.params['background']
     timeout = module.params['timeout']
+    capture_output = module.params['capture_output']
     pid_file = module.params['pid_file']
     working_dir = module.params['working_dir']
     environment = module.params['environment']
     
     # Validate required parameters
-    if state == 'present' and not command:
-        module.fail_json(msg="command is required when state is present")
+    if state == 'present' and not (command or commands):
+        module.fail_json(msg="command or commands is required when state is present")
+    if commands and (state != 'present' or background):
+        module.fail_json(msg="commands is only supported for one-shot processes")
 
     result = dict(
         changed=False,
@@ -232,21 +558,44 @@ def main():
         module.exit_json(**result)
 
     # Handle process management
-    if state == 'present':
+    if commands:
+        result['results'] = []
+        result['rc'] = 0
+        error = None
+        for command, future in zip(commands, run_commands(commands, timeout, capture_output, working_dir, environment)):
+            try:
+                command_result = future.result()
+            except subprocess.TimeoutExpired:
+                command_result = dict(failed=True, msg="Process timed out")
+            except Exception as e:
+                command_result = dict(failed=True, msg=f"Failed to run process: {str(e)}")
+            command_result['command'] = command
+            result['results'].append(command_result)
+            if command_result.get('failed'):
+                error = error or f"{command_result['msg']}: {command}"
+            elif not result['rc']:
+                result['rc'] = command_result['rc']
+        result['changed'] = True
+        result['status'] = 'completed'
+        if error:
+            # The other commands have already run, so report their results too
+            result['status'] = 'failed'
+            module.fail_json(msg=error, **result)
+
+    elif state == 'present':
         if background:
             if pid_file:
                 pid = read_pid_file(pid_file)
-                if pid and is_process_running(pid):
-                    # Verify it's actually our process
-                    proc_info = get_process_info(pid)
-                    if proc_info and command in proc_info['cmdline']:
+                if pid:
+                    # Verify it's still running and actually our process
+                    if _check_alive_and_mine(pid, command):
                         result['status'] = 'running'
                         result['pid'] = pid
-                        result['stdout'] = f"Process already running with PID {pid}"
+                        result['stdout'] = _MSG_ALREADY_RUNNING.format(pid)
                         module.exit_json(**result)
                     else:
                         # Stale PID file, remove it
-                        os.unlink(pid_file)
+                        remove_pid_file(pid_file)
 
             try:
                 # Use shlex to safely parse command
@@ -256,14 +605,14 @@ def main():
                     shell=False,  # Safer than shell=True
                     cwd=working_dir,
                     env=environment,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    preexec_fn=os.setsid,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    start_new_session=True,
                 )
                 result['changed'] = True
                 result['pid'] = process.pid
                 result['status'] = 'running'
-                result['stdout'] = f"Process started with PID {process.pid}"
+                result['stdout'] = _MSG_STARTED.format(process.pid)
                 if pid_file:
                     write_pid_file(pid_file, process.pid)
             except Exception as e:
@@ -271,24 +620,10 @@ def main():
 
         else:
             try:
-                # Use shlex to safely parse command
-                cmd_args = shlex.split(command)
-                process = subprocess.Popen(
-                    cmd_args,
-                    shell=False,  # Safer than shell=True
-                    cwd=working_dir,
-                    env=environment,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                )
-                stdout, stderr = process.communicate(timeout=timeout)
+                result.update(run_command(command, timeout, capture_output, working_dir, environment))
                 result['changed'] = True
-                result['rc'] = process.returncode
-                result['stdout'] = stdout.decode('utf-8')
-                result['stderr'] = stderr.decode('utf-8')
                 result['status'] = 'completed'
             except subprocess.TimeoutExpired:
-                process.kill()
                 module.fail_json(msg="Process timed out")
             except Exception as e:
                 module.fail_json(msg=f"Failed to run process: {str(e)}")
@@ -296,25 +631,24 @@ def main():
     else:  # state == 'absent'
         if pid_file:
             pid = read_pid_file(pid_file)
-            if pid and is_process_running(pid):
+            if pid and _check_alive_and_mine(pid, command):
                 try:
                     # Use improved process killing
                     if kill_process_tree(pid):
                         result['changed'] = True
                         result['status'] = 'stopped'
-                        result['stdout'] = f"Process {pid} and its children stopped"
+                        result['stdout'] = _MSG_TREE_STOPPED.format(pid)
                         # Clean up PID file
-                        os.unlink(pid_file)
+                        remove_pid_file(pid_file)
                     else:
                         module.fail_json(msg=f"Failed to stop process {pid}")
                 except Exception as e:
                     module.fail_json(msg=f"Failed to stop process: {str(e)}")
             else:
                 result['status'] = 'not_running'
-                result['stdout'] = "Process not running"
+                result['stdout'] = _MSG_NOT_RUNNING
                 # Clean up stale PID file
-                if os.path.exists(pid_file):
-                    os.unlink(pid_file)
+                remove_pid_file(pid_file)
         else:
             # Try to find process by command
             pid = find_process_by_command(command)
@@ -323,14 +657,14 @@ def main():
                     if kill_process_tree(pid):
                         result['changed'] = True
                         result['status'] = 'stopped'
-                        result['stdout'] = f"Process {pid} stopped"
+                        result['stdout'] = _MSG_STOPPED.format(pid)
                     else:
                         module.fail_json(msg=f"Failed to stop process {pid}")
                 except Exception as e:
                     module.fail_json(msg=f"Failed to stop process: {str(e)}")
             else:
                 result['status'] = 'not_found'
-                result['stdout'] = "Process not found"
+                result['stdout'] = _MSG_NOT_FOUND
 
     module.exit_json(**result)
 